@@ -47,7 +47,14 @@ CREATE TABLE Song (
     CONSTRAINT fk_song_album
         FOREIGN KEY (album_id) REFERENCES Album(album_id),
     CONSTRAINT uniq_song_title_per_artist
-        UNIQUE (artist_id, title)
+        UNIQUE (artist_id, title),
+    -- Range scans over singles by release date (the analytic queries filter
+    -- on album_id IS NULL plus a half-open date range)
+    KEY idx_song_album_release (album_id, release_date),
+    -- Per-artist probes over singles: the EXISTS pair in
+    -- get_artists_last_single_in_year seeks on (artist_id, album_id)
+    -- and range-scans release_date within it
+    KEY idx_song_artist_album_release (artist_id, album_id, release_date)
 ) ENGINE = InnoDB;
 
 
@@ -63,7 +70,11 @@ CREATE TABLE Rating (
     song_id     INT UNSIGNED NOT NULL,
     rating      TINYINT NOT NULL,
     rating_date DATE NOT NULL,
+    -- (user_id, song_id) is also the covering index for the duplicate-rating
+    -- probe in load_song_ratings, and backs its INSERT IGNORE
     PRIMARY KEY (user_id, song_id),
+    -- Date-range scans in get_most_rated_songs / get_most_engaged_users
+    KEY idx_rating_date (rating_date),
     CONSTRAINT fk_rating_user
         FOREIGN KEY (user_id) REFERENCES User(user_id),
     CONSTRAINT fk_rating_song
@@ -76,6 +87,9 @@ CREATE TABLE SongGenre (
     song_id  INT UNSIGNED NOT NULL,
     genre_id SMALLINT UNSIGNED NOT NULL,
     PRIMARY KEY (song_id, genre_id),
+    -- Genre-leading order for the per-genre aggregate in get_top_song_genres
+    -- (index-only loose scan); also satisfies the genre foreign key
+    KEY idx_songgenre_genre_song (genre_id, song_id),
     CONSTRAINT fk_songgenre_song
         FOREIGN KEY (song_id)
         REFERENCES Song(song_id)
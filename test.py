@@ -8,9 +8,9 @@
 """
 
 from typing import List, Tuple, Set
-import mysql.connector
 
 from music_db import (
+    make_connection_pool,
     clear_database,
     load_single_songs,
     load_albums,
@@ -25,18 +25,29 @@ from music_db import (
 )
 
 
+# 模块级连接池：TCP + 认证握手只付一次，归还的连接还能复用已缓存的预处理语句
+_POOL = None
+
+
 def get_connection():
     """
     根据你自己的环境修改这些连接参数。
     database 名字一定要是你已经执行过 music_db.sql 的那个库。
+
+    返回池中的连接；调用 close() 时连接会归还连接池而不是真正断开。
     """
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",          # 修改为你的 MySQL 用户名
-        password="20050305", # 修改为你的 MySQL 密码
-        database="music_db",  # 建议用和 autograder 一样的名字 music_db
-        autocommit=False,
-    )
+    global _POOL
+    if _POOL is None:
+        _POOL = make_connection_pool(
+            pool_size=10,
+            host="localhost",
+            user="root",          # 修改为你的 MySQL 用户名
+            password="20050305", # 修改为你的 MySQL 密码
+            database="music_db",  # 建议用和 autograder 一样的名字 music_db
+            autocommit=False,
+            use_pure=False,       # 使用 C 扩展驱动；大量小查询时纯 Python 解包是瓶颈
+        )
+    return _POOL.get_connection()
 
 
 def print_section(title: str):
@@ -181,6 +192,37 @@ def run_tests():
         assert len(most_engaged_users) == 3, "应该有 3 个用户有评分"
         assert all(cnt == 2 for (_, cnt) in most_engaged_users), "每个用户的评分次数都应为 2"
 
+        # 12. 大小写变体（collation）测试
+        #     MySQL 默认排序规则不区分大小写，所以 "ALICE" 和已有的 "Alice"
+        #     是同一个 artist，Python 侧的名字解析必须和数据库保持一致。
+        print_section("12. 大小写变体测试")
+        rejected_case_albums = load_albums(
+            db, [("ALICE ALBUM", "Pop", "ALICE", "2021-01-01", [])]
+        )
+        print("case-variant album rejected:", rejected_case_albums)
+        assert rejected_case_albums == {("ALICE ALBUM", "ALICE")}, \
+            "大小写变体的重复专辑应该被拒绝，而不是报 KeyError 或重复插入"
+
+        rejected_case_singles = load_single_songs(
+            db, [("SKY", ("Pop",), "Alice", "2020-03-03")]
+        )
+        print("case-variant single rejected:", rejected_case_singles)
+        assert rejected_case_singles == {("SKY", "Alice")}, \
+            "大小写变体的重复单曲应该被拒绝，而不是被悄悄丢掉"
+
+        rejected_case_users = load_users(db, ["USER1"])
+        print("case-variant user rejected:", rejected_case_users)
+        assert rejected_case_users == {"USER1"}, \
+            "大小写变体的重复用户名应该被拒绝，而不是让整批插入失败回滚"
+
+        # 引用已有用户/歌曲时的大小写变体应该照常解析，而不是被当成不存在
+        rejected_case_ratings = load_song_ratings(
+            db, [("USER3", ("ALICE", "Rock Me"), 4, "2020-07-01")]
+        )
+        print("case-variant rating rejected:", rejected_case_ratings)
+        assert rejected_case_ratings == set(), \
+            "大小写变体引用已有用户和歌曲的评分应该被接受"
+
         print_section("所有基本测试通过 ✔")
         print("如果你看到了这些输出，说明各个函数在这组测试数据上运行正常。")
 